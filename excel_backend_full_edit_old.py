@@ -0,0 +1,462 @@
+"""Flask API for editing the shared movie list workbook.
+
+Companion service to weather_backend.py on the same LAN box: the "full
+edit" dashboard page reads and edits a movie list kept in an Excel
+workbook with a single named table.  Columns A-I are typed in by hand,
+J-M hold formulas derived from columns A and B, so writers have to keep
+the table ref and the formula rows consistent.
+
+Run:  python excel_backend_full_edit_old.py   (listens on 0.0.0.0:5006)
+"""
+
+import atexit
+import os
+import re
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import lru_cache
+from threading import Event, RLock, Thread
+
+from flask import Flask, jsonify, request
+from openpyxl import load_workbook
+from openpyxl.utils import get_column_letter
+from openpyxl.utils.cell import coordinate_from_string
+
+from orjson_provider import OrjsonProvider
+
+app = Flask(__name__)
+app.json = OrjsonProvider(app)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+EXCEL_FILE = os.environ.get('MOVIES_FILE', os.path.join(BASE_DIR, 'movies.xlsx'))
+BACKUP_DIR = os.path.join(os.path.dirname(EXCEL_FILE), 'backups')
+
+# Field names the frontend uses are just the column letters.
+COLUMN_LETTERS = {1: 'A', 2: 'B', 3: 'C', 4: 'D', 5: 'E', 6: 'F', 7: 'G',
+                  8: 'H', 9: 'I', 10: 'J', 11: 'K', 12: 'L', 13: 'M'}
+EDITABLE_COLUMNS = [1, 2, 3, 4, 5, 6, 7, 8, 9]
+FORMULA_COLUMNS = [10, 11, 12, 13]
+DATE_COLUMNS = [2]  # column B = watched date
+_MAX_EDITABLE_COL_LETTER = get_column_letter(max(EDITABLE_COLUMNS))
+
+# Split by separator so parse_date only tries formats that can match;
+# a failed strptime raises, and exceptions are the expensive part.
+_DATE_FORMATS_DASH = ['%d-%b-%Y', '%Y-%m-%d']
+_DATE_FORMATS_SLASH = ['%m/%d/%Y', '%m/%d/%y', '%d/%m/%Y', '%d/%m/%y']
+
+# Field names for columns 1-13, computed once instead of per cell.
+_FIELD_NAMES = [COLUMN_LETTERS.get(i) or get_column_letter(i)
+                for i in range(1, 14)]
+
+# Reads used to re-parse the whole XLSX zip on every /api/data call.
+# Cache the loaded workbook keyed by path and only reload when the file's
+# mtime changes (i.e. after one of our own saves, or an edit in Excel).
+_WB_LOCK = RLock()
+_WB_CACHE = {}  # path -> (st_mtime_ns, workbook)
+
+
+def _get_workbook(path=None):
+    """Return the cached read-only workbook for path, reloading only when
+    the file changed on disk.
+
+    read_only uses openpyxl's streaming parser, so rows are decoded on
+    iteration instead of materializing every Cell up front.
+    """
+    path = path or EXCEL_FILE
+    mtime_ns = os.stat(path).st_mtime_ns
+    with _WB_LOCK:
+        cached = _WB_CACHE.get(path)
+        if cached is not None and cached[0] == mtime_ns:
+            return cached[1]
+        if cached is not None:
+            cached[1].close()
+        wb = load_workbook(path, read_only=True, data_only=True)
+        _WB_CACHE[path] = (mtime_ns, wb)
+        return wb
+
+
+def _invalidate_workbook(path=None):
+    with _WB_LOCK:
+        cached = _WB_CACHE.pop(path or EXCEL_FILE, None)
+    if cached is not None:
+        cached[1].close()
+
+
+# Writers used to do load_workbook + wb.save per request; saving re-zips
+# every sheet XML, which dominates the cost of a write on a big workbook.
+# Instead keep one editable workbook in memory, mutate it under
+# _EDIT_LOCK, and let a background thread flush dirty state to disk
+# (write temp + os.replace) about every 2 seconds and at process exit, so
+# a burst of N writes costs one save.  Trade-off: a hard crash can lose
+# the last couple of seconds of edits; the per-write backups still bound
+# the damage.  Reads flush first, so the API never serves stale data.
+_EDIT_LOCK = RLock()
+_EDIT_WB = None  # (st_mtime_ns at load/flush, workbook)
+_DIRTY = Event()
+_FLUSH_INTERVAL = 2.0
+
+
+def _get_edit_workbook():
+    """Return the shared editable workbook, loading it on first use and
+    reloading when the file changed on disk underneath us.  Unflushed
+    in-memory edits always win over an on-disk change."""
+    global _EDIT_WB
+    mtime_ns = os.stat(EXCEL_FILE).st_mtime_ns
+    with _EDIT_LOCK:
+        if _EDIT_WB is not None:
+            if _DIRTY.is_set() or _EDIT_WB[0] == mtime_ns:
+                return _EDIT_WB[1]
+        wb = load_workbook(EXCEL_FILE)
+        _EDIT_WB = (mtime_ns, wb)
+        return wb
+
+
+def _mark_dirty():
+    _DIRTY.set()
+
+
+def _flush_workbook():
+    """Write the in-memory workbook to disk atomically (no-op if clean)."""
+    global _EDIT_WB
+    with _EDIT_LOCK:
+        if _EDIT_WB is None or not _DIRTY.is_set():
+            return
+        wb = _EDIT_WB[1]
+        tmp_path = EXCEL_FILE + '.tmp'
+        wb.save(tmp_path)
+        os.replace(tmp_path, EXCEL_FILE)
+        _DIRTY.clear()
+        _EDIT_WB = (os.stat(EXCEL_FILE).st_mtime_ns, wb)
+    _invalidate_workbook()
+
+
+def _flush_loop():
+    while True:
+        _DIRTY.wait()
+        time.sleep(_FLUSH_INTERVAL)  # let a burst of writes coalesce
+        _flush_workbook()
+
+
+Thread(target=_flush_loop, name='wb-flush', daemon=True).start()
+atexit.register(_flush_workbook)
+
+
+@lru_cache(maxsize=4096)
+def parse_date(date_str):
+    """Parse the handful of date spellings that show up in the sheet.
+
+    Memoized: the same strings recur across batch edits of the sheet.
+    """
+    formats = _DATE_FORMATS_SLASH if '/' in date_str else _DATE_FORMATS_DASH
+    for fmt in formats:
+        try:
+            return datetime.strptime(date_str, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def parse_coordinate(coord_str):
+    """Split an A1-style coordinate into ('A', 1)."""
+    col, row = coordinate_from_string(coord_str)
+    return col, row
+
+
+def get_table_info(ws):
+    """Return (name, ref) of the sheet's single table."""
+    # TableList.items() yields (name, ref) pairs directly.
+    try:
+        return next(iter(ws.tables.items()))
+    except StopIteration:
+        raise ValueError('No table found on sheet %r' % ws.title)
+
+
+def create_backup(original_file):
+    """Copy the workbook aside before we touch it."""
+    os.makedirs(BACKUP_DIR, exist_ok=True)
+    stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    backup_file = os.path.join(
+        BACKUP_DIR,
+        '%s_%s.xlsx' % (os.path.splitext(os.path.basename(original_file))[0], stamp))
+    shutil.copy2(original_file, backup_file)
+    return backup_file
+
+
+# Backups used to run as a synchronous full copy on the request thread,
+# adding O(file size) IO to every write call.  Run them on a one-worker
+# pool instead so the copy overlaps the workbook load and mutation; the
+# writer waits for the snapshot just before saving, which keeps the
+# backup strictly pre-write.  (A hardlink "snapshot" would not work:
+# openpyxl saves in place on the same inode, so the link would just
+# mirror the post-save file.)
+_BACKUP_POOL = ThreadPoolExecutor(max_workers=1)
+_PENDING_BACKUP = None
+
+
+def _schedule_backup():
+    global _PENDING_BACKUP
+    _PENDING_BACKUP = _BACKUP_POOL.submit(create_backup, EXCEL_FILE)
+
+
+def _await_backup():
+    """Block until the scheduled backup has finished (no-op if none)."""
+    global _PENDING_BACKUP
+    pending, _PENDING_BACKUP = _PENDING_BACKUP, None
+    if pending is not None:
+        pending.result()
+
+
+# Matches a reference into columns A/B, e.g. "B12" in "=YEAR(B12)".  The
+# word boundaries keep multi-letter columns like AA10 from matching.
+_REF_RE = re.compile(r'\b([A-B])(\d+)\b', re.IGNORECASE)
+
+
+def copy_formulas(ws, source_row, target_row):
+    """Copy the J-M formulas from source_row to target_row, rewriting the
+    A/B row references to point at the target row."""
+    if source_row == target_row:
+        # Nothing to retarget: the formulas already point at this row.
+        return
+    old_row = str(source_row)
+
+    def _retarget(match):
+        if match.group(2) == old_row:
+            return match.group(1) + str(target_row)
+        return match.group(0)
+
+    for col_idx in FORMULA_COLUMNS:
+        source_cell = ws.cell(row=source_row, column=col_idx)
+        target_cell = ws.cell(row=target_row, column=col_idx)
+        if source_cell.value and str(source_cell.value).startswith('='):
+            target_cell.value = _REF_RE.sub(_retarget, str(source_cell.value))
+
+
+def get_data_from_excel():
+    """Read every table row into a list of {letter: value} dicts.
+
+    Read-only worksheets don't expose ws.tables, so the row span comes
+    from the sheet dimension instead of the table ref; the table starts
+    at row 1 and the writers keep stray rows below it cleared, so the
+    two agree.
+    """
+    _flush_workbook()  # no-op unless there are unflushed edits
+    wb = _get_workbook()
+    ws = wb.active
+
+    data = []
+    for row_idx, row_values in enumerate(
+            ws.iter_rows(min_row=2, max_row=ws.max_row,
+                         min_col=1, max_col=13, values_only=True),
+            start=2):
+        # orjson serializes datetime/date natively, so raw cell values go
+        # straight into the response dict.
+        row_data = {'row_index': row_idx}
+        row_data.update(zip(_FIELD_NAMES, row_values))
+        data.append(row_data)
+    return data
+
+
+def _write_editable_columns(ws, row_index, data):
+    """Write whichever editable fields are present in data to row_index."""
+    for col_idx in EDITABLE_COLUMNS:
+        field = COLUMN_LETTERS[col_idx]
+        if field not in data:
+            continue
+        value = data[field]
+        if col_idx in DATE_COLUMNS and isinstance(value, str) and value:
+            parsed = parse_date(value)
+            if parsed is not None:
+                value = parsed
+        ws.cell(row=row_index, column=col_idx).value = value
+
+
+def _update_row(ws, row_index, data):
+    # Bound by the table ref, not ws.max_row: max_row can force a full
+    # sheet scan when the dimension is unset, and the table already knows
+    # its own extent.
+    _, table_range = get_table_info(ws)
+    end_row = parse_coordinate(table_range.split(':')[1])[1]
+    if row_index < 2 or row_index > end_row:
+        return False, 'Row index %s out of range' % row_index
+    _write_editable_columns(ws, row_index, data)
+    # No formula refresh needed: the row's formulas already reference
+    # row_index, and Excel recalculates on open regardless.
+    return True, 'Row %d updated' % row_index
+
+
+def update_row_in_excel(row_index, data):
+    """Write the editable columns of one row."""
+    with _EDIT_LOCK:
+        ok, result = _update_row(_get_edit_workbook().active, row_index, data)
+        if ok:
+            _await_backup()
+            _mark_dirty()
+    return ok, result
+
+
+def _insert_row(ws, data):
+    table_name, table_range = get_table_info(ws)
+    start_cell, end_cell = table_range.split(':')
+    end_col, end_row = parse_coordinate(end_cell)
+    new_row = end_row + 1
+
+    # Clear any stray values left behind below the table.
+    for row in ws['A%d:%s%d' % (new_row, _MAX_EDITABLE_COL_LETTER, new_row)]:
+        for cell in row:
+            cell.value = None
+
+    _write_editable_columns(ws, new_row, data)
+    copy_formulas(ws, end_row, new_row)
+    ws.tables[table_name].ref = '%s:%s%d' % (start_cell, end_col, new_row)
+    return True, new_row
+
+
+def insert_row_to_excel(data):
+    """Append a row after the table, copy formulas down, grow the table."""
+    with _EDIT_LOCK:
+        ok, result = _insert_row(_get_edit_workbook().active, data)
+        if ok:
+            _await_backup()
+            _mark_dirty()
+    return ok, result
+
+
+def _delete_row(ws, row_index):
+    table_name, table_range = get_table_info(ws)
+    start_cell, end_cell = table_range.split(':')
+    end_col, end_row = parse_coordinate(end_cell)
+    if row_index < 2 or row_index > end_row:
+        return False, 'Row index %s out of range' % row_index
+
+    ws.delete_rows(row_index)
+    ws.tables[table_name].ref = '%s:%s%d' % (start_cell, end_col, end_row - 1)
+    return True, 'Row %d deleted' % row_index
+
+
+def delete_row_from_excel(row_index):
+    """Delete one row and shrink the table ref to match."""
+    with _EDIT_LOCK:
+        ok, result = _delete_row(_get_edit_workbook().active, row_index)
+        if ok:
+            _await_backup()
+            _mark_dirty()
+    return ok, result
+
+
+def _apply_ops(ws, ops):
+    """Apply a list of batch ops to ws, returning one result per op.
+
+    Row indices are interpreted as they stand when each op runs, exactly
+    as if the ops had arrived as separate requests in the same order.
+    """
+    results = []
+    for op in ops:
+        kind = op.get('op') if isinstance(op, dict) else None
+        try:
+            if kind == 'update':
+                ok, result = _update_row(ws, int(op['row_index']), op)
+                results.append({'success': ok, 'message': result})
+            elif kind == 'add':
+                ok, new_row = _insert_row(ws, op)
+                results.append({'success': ok, 'row_index': new_row})
+            elif kind == 'delete':
+                ok, result = _delete_row(ws, int(op['row_index']))
+                results.append({'success': ok, 'message': result})
+            else:
+                results.append({'success': False,
+                                'message': 'Unknown op %r' % kind})
+        except (KeyError, TypeError, ValueError) as e:
+            results.append({'success': False, 'message': str(e)})
+    return results
+
+
+@app.after_request
+def add_cors_headers(response):
+    # Old Safari on the iPad is strict about CORS on XHR.
+    response.headers['Access-Control-Allow-Origin'] = '*'
+    response.headers['Access-Control-Allow-Methods'] = 'GET, POST, OPTIONS'
+    response.headers['Access-Control-Allow-Headers'] = 'Content-Type'
+    return response
+
+
+@app.route('/api/data')
+def get_data():
+    try:
+        return jsonify({'success': True, 'data': get_data_from_excel()})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@app.route('/api/update', methods=['POST'])
+def update_data():
+    payload = request.json or {}
+    row_index = payload.get('row_index')
+    if row_index is None:
+        return jsonify({'success': False, 'error': 'Missing row_index'}), 400
+    try:
+        _schedule_backup()
+        ok, message = update_row_in_excel(int(row_index), payload)
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+    status = 200 if ok else 400
+    return jsonify({'success': ok, 'message': message}), status
+
+
+@app.route('/api/add', methods=['POST'])
+def add_data():
+    payload = request.json or {}
+    try:
+        _schedule_backup()
+        ok, result = insert_row_to_excel(payload)
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+    if not ok:
+        return jsonify({'success': False, 'message': result}), 400
+    return jsonify({'success': True, 'row_index': result})
+
+
+MAX_BATCH_OPS = 500  # backpressure: bounds memory and lock hold time
+
+
+@app.route('/api/batch', methods=['POST'])
+def batch_data():
+    """Apply many update/add/delete ops with one workbook pass and one
+    backup, instead of one request (and one save) per row."""
+    payload = request.json or {}
+    ops = payload.get('ops')
+    if not isinstance(ops, list) or not ops:
+        return jsonify({'success': False, 'error': 'Missing ops array'}), 400
+    if len(ops) > MAX_BATCH_OPS:
+        return jsonify({'success': False,
+                        'error': 'Too many ops (max %d)' % MAX_BATCH_OPS}), 413
+    try:
+        _schedule_backup()
+        with _EDIT_LOCK:
+            results = _apply_ops(_get_edit_workbook().active, ops)
+            _await_backup()
+            _mark_dirty()
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+    return jsonify({'success': all(r['success'] for r in results),
+                    'results': results})
+
+
+@app.route('/api/delete', methods=['POST'])
+def delete_data():
+    payload = request.json or {}
+    row_index = payload.get('row_index')
+    if row_index is None:
+        return jsonify({'success': False, 'error': 'Missing row_index'}), 400
+    try:
+        _schedule_backup()
+        ok, message = delete_row_from_excel(int(row_index))
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+    status = 200 if ok else 400
+    return jsonify({'success': ok, 'message': message}), status
+
+
+if __name__ == '__main__':
+    app.run(host='0.0.0.0', port=5006)
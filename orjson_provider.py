@@ -0,0 +1,19 @@
+"""orjson-backed Flask JSON provider shared by both backend services."""
+
+import orjson
+from flask.json.provider import JSONProvider
+
+
+class OrjsonProvider(JSONProvider):
+    """Serialize with orjson instead of the stdlib json module.
+
+    orjson emits bytes directly and handles datetime/date natively, so
+    large /api/data responses skip both the pure-Python encoder and the
+    manual isoformat() conversion of every date cell.
+    """
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj)
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
@@ -0,0 +1,193 @@
+"""Flask tunnel for the weather dashboard.
+
+The iPad 2 (iOS 9) cannot negotiate TLS 1.2 with modern APIs, so the
+dashboard wraps every upstream call in ?url=... and sends it here (see
+shared-data.js / index_old_ipad.html).  This service validates the target
+against a whitelist, fetches it server-side and returns the JSON with CORS
+headers that old Safari accepts.
+
+Run:  python weather_backend.py   (listens on 0.0.0.0:5005)
+"""
+
+import hashlib
+import os
+from email.utils import parsedate_to_datetime
+from threading import Event, Lock
+
+import httpx
+from cachetools import TTLCache
+from flask import Flask, Response, jsonify, request
+from flask_limiter import Limiter
+from flask_limiter.util import get_remote_address
+from urllib.parse import urlparse, parse_qs, parse_qsl, urlencode, urlunparse
+
+from orjson_provider import OrjsonProvider
+
+app = Flask(__name__)
+app.json = OrjsonProvider(app)
+
+# A reload loop on one device (or an abusive client) can hammer the proxy
+# and, through it, open-meteo.  Cap per-IP request rates; the TTL cache's
+# single-flight already collapses identical concurrent URLs to one
+# upstream fetch, so these limits only bite genuinely misbehaving
+# clients.  Header injection stays off: it would stamp the limiter's own
+# Retry-After onto every response, clobbering the upstream one we forward
+# on 429s.
+limiter = Limiter(
+    get_remote_address,
+    app=app,
+    default_limits=['60/minute'],
+    storage_uri='memory://',
+)
+
+# Hosts the dashboard is allowed to tunnel to.
+ALLOWED_DOMAINS = frozenset([
+    'api.open-meteo.com',
+    'air-quality-api.open-meteo.com',
+    'api.frankfurter.app',
+])
+
+# Static response headers, built once; per-request values (Content-Type,
+# ETag, Last-Modified) are layered onto a copy.
+_BASE_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Methods': 'GET',
+    'Cache-Control': 'public, max-age=300',
+}
+
+# Optional commercial Open-Meteo key, injected server-side so it never
+# shows up in the page source on the iPad.
+OPENMETEO_API_KEY = os.environ.get('OPENMETEO_API_KEY', '')
+
+# One pooled client for the life of the process: keep-alive sockets mean
+# repeat fetches to the same upstream skip the TCP + TLS handshake, and
+# with HTTP/2 (open-meteo's CDN supports it; httpx negotiates via ALPN
+# and falls back to HTTP/1.1) concurrent in-flight fetches multiplex
+# over a single connection instead of one socket each.
+CLIENT = httpx.Client(
+    timeout=httpx.Timeout(10.0, connect=3.05),
+    transport=httpx.HTTPTransport(
+        http2=True,
+        retries=2,  # connect-level retries; failed statuses are not retried
+        limits=httpx.Limits(max_keepalive_connections=64, max_connections=128),
+    ),
+)
+
+# Dashboards on several devices ask for the same forecast URLs over and
+# over; within the 5-minute window a repeat is answered from memory with
+# no upstream round trip at all.
+_CACHE = TTLCache(maxsize=1024, ttl=300)
+_CACHE_LOCK = Lock()
+_INFLIGHT = {}  # canonical URL key -> Event, guarded by _CACHE_LOCK
+
+
+def _cache_key(url):
+    # Canonicalize so the same query in a different param order still hits.
+    parts = urlparse(url)
+    return (parts.scheme, parts.netloc, parts.path,
+            tuple(sorted(parse_qsl(parts.query))))
+
+
+def _fetch_upstream(target_url):
+    """GET target_url through the pooled client, caching 200 responses.
+
+    Returns (status, body, content_type, last_modified, retry_after).
+    Simultaneous
+    misses for the same URL collapse to a single upstream call; the other
+    callers wait on an Event and read the cached result.
+    """
+    key = _cache_key(target_url)
+    with _CACHE_LOCK:
+        cached = _CACHE.get(key)
+        if cached is not None:
+            return cached
+        waiter = _INFLIGHT.get(key)
+        if waiter is None:
+            _INFLIGHT[key] = Event()
+
+    if waiter is not None:
+        waiter.wait(timeout=15)
+        with _CACHE_LOCK:
+            cached = _CACHE.get(key)
+        if cached is not None:
+            return cached
+        # The fetch we waited on failed or timed out; try it ourselves.
+
+    try:
+        proxy_response = CLIENT.get(target_url)
+        result = (proxy_response.status_code, proxy_response.content,
+                  proxy_response.headers.get('Content-Type', 'application/json'),
+                  proxy_response.headers.get('Last-Modified'),
+                  proxy_response.headers.get('Retry-After'))
+        if proxy_response.status_code == 200:
+            with _CACHE_LOCK:
+                _CACHE[key] = result
+        return result
+    finally:
+        if waiter is None:  # we were the registered leader for this key
+            with _CACHE_LOCK:
+                event = _INFLIGHT.pop(key, None)
+            if event is not None:
+                event.set()
+
+
+@app.route('/')
+@limiter.limit('30/minute')
+def proxy():
+    target_url = request.args.get('url')
+    if not target_url:
+        return jsonify({'error': 'Missing url parameter'}), 400
+
+    target_domain = urlparse(target_url).netloc
+    if target_domain not in ALLOWED_DOMAINS:
+        return jsonify({'error': 'Domain not allowed'}), 403
+
+    # Inject the API key for Open-Meteo requests if we have one.
+    if OPENMETEO_API_KEY and target_domain.endswith('open-meteo.com'):
+        url_parts = list(urlparse(target_url))
+        query = parse_qs(url_parts[4])
+        query['apikey'] = [OPENMETEO_API_KEY]
+        url_parts[4] = urlencode(query, doseq=True)
+        target_url = urlunparse(url_parts)
+
+    try:
+        status, body, content_type, last_modified, retry_after = \
+            _fetch_upstream(target_url)
+    except httpx.HTTPError as e:
+        return jsonify({'error': 'Upstream request failed', 'reason': str(e)}), 502
+
+    response_headers = dict(_BASE_HEADERS)
+    response_headers['Content-Type'] = content_type
+    if status == 429 and retry_after:
+        # Upstream throttled us: pass its Retry-After through honestly so
+        # clients back off instead of retrying into the same limit.
+        response_headers['Retry-After'] = retry_after
+
+    # Conditional responses: weather JSON barely changes within the cache
+    # window, so let the client revalidate instead of re-downloading the
+    # full payload every time.
+    etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+    response_headers['ETag'] = etag
+    if last_modified:
+        response_headers['Last-Modified'] = last_modified
+
+    if request.headers.get('If-None-Match') == etag:
+        return Response(status=304, headers=response_headers)
+    if last_modified and not request.headers.get('If-None-Match'):
+        if_modified_since = request.headers.get('If-Modified-Since')
+        if if_modified_since:
+            try:
+                if parsedate_to_datetime(last_modified) <= parsedate_to_datetime(if_modified_since):
+                    return Response(status=304, headers=response_headers)
+            except (TypeError, ValueError):
+                pass  # unparseable date header: fall through to a full response
+
+    # The body is deliberately buffered, not streamed: the ETag above and
+    # the TTL cache both need the complete payload, and forecast responses
+    # are a few KB. The bytes pass straight through to the socket without
+    # a str decode/re-encode.
+    return Response(body, status=status, headers=response_headers)
+
+
+if __name__ == '__main__':
+    app.run(host='0.0.0.0', port=5005)
@@ -0,0 +1,23 @@
+"""Gunicorn entrypoint for the weather proxy.
+
+The Werkzeug dev server in weather_backend.py handles one blocking
+upstream call at a time; under gevent workers thousands of proxied
+fetches can be in flight per process because greenlets yield while
+waiting on the upstream socket.
+
+Run:
+    gunicorn -k gevent -w 2 --worker-connections 1000 -b 0.0.0.0:5005 wsgi:app
+
+python weather_backend.py still works for quick local debugging.
+"""
+
+# Patch stdlib sockets before the HTTP client stack gets imported,
+# otherwise its module-level socket references bypass gevent.
+from gevent import monkey
+
+monkey.patch_all()
+
+from weather_backend import app  # noqa: E402
+
+if __name__ == '__main__':
+    app.run(host='0.0.0.0', port=5005)